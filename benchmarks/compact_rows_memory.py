@@ -0,0 +1,93 @@
+"""
+Compare the memory held by raw Notion query results against CompactRows.
+
+    python benchmarks/compact_rows_memory.py --rows 100000
+
+Rows are synthetic but shaped like databases.query results (ids, parents, annotations, etc.).
+"""
+import argparse
+import gc
+import tracemalloc
+import uuid
+
+from notion_logger.notion_rows import CompactRows
+
+ANNOTATIONS = {"bold": False, "italic": False, "strikethrough": False, "underline": False, "code": False, "color": "default"}
+
+def _text(prop_id, prop_type, content):
+    return {"id": prop_id, "type": prop_type, prop_type: [{
+        "type": "text", "text": {"content": content, "link": None},
+        "annotations": dict(ANNOTATIONS), "plain_text": content, "href": None}]}
+
+def make_schema():
+    return {
+        "Name": {"id": "title", "type": "title"},
+        "uuid": {"id": "a%3Ab", "type": "rich_text"},
+        "arch": {"id": "c%3Ad", "type": "select"},
+        "epoch": {"id": "e%3Af", "type": "number"},
+        "loss": {"id": "g%3Ah", "type": "number"},
+        "Tags": {"id": "i%3Aj", "type": "multi_select"},
+        "done": {"id": "k%3Al", "type": "checkbox"},
+    }
+
+def make_row(i):
+    arch = ["resnet18", "resnet50", "vit_b16"][i % 3]
+    return {
+        "object": "page",
+        "id": str(uuid.uuid4()),
+        "created_time": "2024-05-02T12:15:00.000Z",
+        "last_edited_time": "2024-05-02T12:16:00.000Z",
+        "created_by": {"object": "user", "id": str(uuid.uuid4())},
+        "last_edited_by": {"object": "user", "id": str(uuid.uuid4())},
+        "cover": None, "icon": None,
+        "parent": {"type": "database_id", "database_id": "d9824bdc-8445-4327-be8b-5b47500af6ce"},
+        "archived": False,
+        "properties": {
+            "Name": _text("title", "title", f"run-{i}"),
+            "uuid": _text("a%3Ab", "rich_text", f"20240502_{i:06d}"),
+            "arch": {"id": "c%3Ad", "type": "select", "select": {"id": "opt", "name": arch, "color": "blue"}},
+            "epoch": {"id": "e%3Af", "type": "number", "number": i % 90},
+            "loss": {"id": "g%3Ah", "type": "number", "number": 1.0 / (i + 1)},
+            "Tags": {"id": "i%3Aj", "type": "multi_select", "multi_select": [
+                {"id": "t1", "name": "tag2", "color": "red"}, {"id": "t2", "name": "tag4", "color": "green"}]},
+            "done": {"id": "k%3Al", "type": "checkbox", "checkbox": i % 2 == 0},
+        },
+        "url": f"https://www.notion.so/run-{i}",
+        "public_url": None,
+    }
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+    schema = make_schema()
+
+    raw, raw_current, raw_peak = measure(lambda: [make_row(i) for i in range(args.rows)])
+    del raw
+
+    def build_compact():
+        # decode page by page, as get_compact_rows does, so raw pages are freed as we go
+        rows = CompactRows(schema)
+        for start in range(0, args.rows, args.page_size):
+            rows.extend([make_row(i) for i in range(start, min(start + args.page_size, args.rows))])
+        return rows
+
+    compact, compact_current, compact_peak = measure(build_compact)
+
+    mb = 1024 ** 2
+    print(f"rows: {args.rows}")
+    print(f"raw JSON:    held {raw_current / mb:8.1f} MB  peak {raw_peak / mb:8.1f} MB")
+    print(f"CompactRows: held {compact_current / mb:8.1f} MB  peak {compact_peak / mb:8.1f} MB")
+    print(f"ratio (held): {raw_current / compact_current:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,6 @@
-from .notion_logger import NotionLogger
\ No newline at end of file
+from .notion_logger import NotionLogger, SchemaCache
+from .notion_log_stream import NotionLogStream
+from .notion_export import read_export
+from .notion_rate_limit import RateLimiter, RateLimitedClient
+from .notion_workspace import NotionWorkspace
+from .notion_rows import CompactRow, CompactRows
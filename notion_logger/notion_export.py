@@ -0,0 +1,170 @@
+import os
+import json
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from . import notion_functional as F
+
+__all__ = ['export_database', 'read_export']
+
+MANIFEST_NAME = "_manifest.json"
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.000Z"
+
+# bookkeeping columns written alongside the decoded properties
+ID_COLUMN = "_id"
+CREATED_COLUMN = "_created_time"
+EDITED_COLUMN = "_last_edited_time"
+ARCHIVED_COLUMN = "_archived"
+META_COLUMNS = [ID_COLUMN, CREATED_COLUMN, EDITED_COLUMN, ARCHIVED_COLUMN]
+# scratch column read_export uses to find each id's last occurrence
+ROW_COLUMN = "_row"
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        import pyarrow.compute
+    except ImportError:
+        raise ImportError("Parquet export requires pyarrow: pip install 'notion-logger[parquet]'")
+    return pyarrow
+
+def _load_manifest(path):
+    manifest_path = os.path.join(path, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return {"database_id": None, "watermark": None, "partitions": [], "ids": []}
+    with open(manifest_path, "r") as f:
+        return json.load(f)
+
+def _save_manifest(path, manifest):
+    # write-then-rename so an interrupted export never leaves a half-written manifest
+    manifest_path = os.path.join(path, MANIFEST_NAME)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+def rows_to_export_frame(rows, archived_ids=()):
+    """
+    Decode Notion rows to a DataFrame with bookkeeping columns, plus tombstone rows for archived_ids.
+    """
+    df = F.notion_rows_to_dataframe(rows)
+    df[ID_COLUMN] = [row['id'] for row in rows]
+    df[CREATED_COLUMN] = [row['created_time'] for row in rows]
+    df[EDITED_COLUMN] = [row['last_edited_time'] for row in rows]
+    df[ARCHIVED_COLUMN] = [row.get('archived', False) for row in rows]
+
+    if archived_ids:
+        now = datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+        tombstones = pd.DataFrame({
+            ID_COLUMN: list(archived_ids),
+            CREATED_COLUMN: None,
+            EDITED_COLUMN: now,
+            ARCHIVED_COLUMN: True,
+        })
+        df = pd.concat([df, tombstones], ignore_index=True)
+    return df
+
+def export_database(client, database_id, path, detect_deletes=True, page_size=100, schema=None):
+    """
+    Export a database to partitioned Parquet under `path`, appending only rows created or edited
+    since the previous export. Each call writes one new partition file and updates the manifest.
+
+    Notion's query API never returns archived pages, so when detect_deletes is True the ids of all
+    live rows are listed and rows that disappeared since the last export are written as tombstones.
+    That listing asks only for the title property (filter_properties), so it downloads ids rather
+    than full rows, but it still costs one query per page_size rows; pass detect_deletes=False to
+    skip it on very large tables. schema is fetched if not given.
+    """
+    pa = _import_pyarrow()
+    os.makedirs(path, exist_ok=True)
+    manifest = _load_manifest(path)
+    if manifest["database_id"] is not None and manifest["database_id"] != database_id:
+        raise ValueError(f"Export at '{path}' belongs to database '{manifest['database_id']}', not '{database_id}'.")
+
+    # last_edited_time is rounded down to the minute, so the next export resumes from the start of the
+    # minute before this one began (tolerating some clock skew); read_export dedupes the overlap by id
+    started = datetime.now(timezone.utc).replace(second=0, microsecond=0) - timedelta(minutes=1)
+
+    filters = None
+    if manifest["watermark"] is not None:
+        filters = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": manifest["watermark"]}}
+    sorts = [{"timestamp": "last_edited_time", "direction": "ascending"}]
+    rows = F.get_database_rows(client, database_id, filters=filters, sorts=sorts, page_size=page_size)
+
+    known_ids = set(manifest["ids"])
+    archived_ids = []
+    if detect_deletes:
+        if filters is None:
+            live_ids = {row['id'] for row in rows}
+        else:
+            if schema is None:
+                schema = F.get_database_schema(client, database_id)
+            live_ids = set(F.list_row_ids(client, database_id, schema, page_size=page_size))
+        archived_ids = sorted(known_ids - live_ids)
+        known_ids = live_ids
+    else:
+        known_ids.update(row['id'] for row in rows)
+
+    written = None
+    if rows or archived_ids:
+        df = rows_to_export_frame(rows, archived_ids)
+        written = f"part-{len(manifest['partitions']):05d}.parquet"
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pa.parquet.write_table(table, os.path.join(path, written))
+        manifest["partitions"].append(written)
+
+    manifest["watermark"] = started.strftime(TIMESTAMP_FORMAT)
+    manifest["database_id"] = database_id
+    manifest["ids"] = sorted(known_ids)
+    _save_manifest(path, manifest)
+
+    return {"partition": written, "rows": len(rows), "archived": len(archived_ids)}
+
+def read_export(path, columns=None, include_archived=False, as_table=False):
+    """
+    Load an export written by export_database, keeping the latest version of each row.
+
+    Partitions are read through memory-mapped Arrow and only `columns` (plus the bookkeeping
+    columns needed to resolve row versions) are materialized. Deduping and archived filtering
+    run in Arrow; the result is converted to pandas only when as_table is False.
+    """
+    pa = _import_pyarrow()
+    pc = pa.compute
+    manifest = _load_manifest(path)
+    if not manifest["partitions"]:
+        raise ValueError(f"No exported partitions found at '{path}'.")
+
+    read_columns = None
+    if columns is not None:
+        read_columns = list(columns) + [c for c in META_COLUMNS if c not in columns]
+
+    tables = []
+    for partition in manifest["partitions"]:
+        partition_path = os.path.join(path, partition)
+        if read_columns is not None:
+            # a column added to the database after an older partition was written is simply absent there
+            available = pa.parquet.read_schema(partition_path, memory_map=True).names
+            partition_columns = [c for c in read_columns if c in available]
+        else:
+            partition_columns = None
+        tables.append(pa.parquet.read_table(partition_path, columns=partition_columns, memory_map=True))
+
+    # partitions may differ in columns (schema changes) and types (e.g. an all-null column in a tombstone partition)
+    table = pa.concat_tables(tables, promote_options="permissive")
+
+    # partitions are appended in edit order, so the last occurrence of an id is its current state
+    table = table.append_column(ROW_COLUMN, pa.array(np.arange(table.num_rows, dtype=np.int64)))
+    latest = table.group_by(ID_COLUMN, use_threads=False).aggregate([(ROW_COLUMN, "max")])
+    rows = latest.column(ROW_COLUMN + "_max")
+    table = table.take(pc.take(rows, pc.sort_indices(rows)))
+    table = table.drop_columns([ROW_COLUMN])
+    if not include_archived:
+        table = table.filter(pc.invert(pc.fill_null(table.column(ARCHIVED_COLUMN), False)))
+    if columns is not None:
+        table = table.select([c for c in read_columns if c in table.column_names and (c in columns or c == ID_COLUMN)])
+
+    if as_table:
+        return table
+    return table.to_pandas()
@@ -1,11 +1,48 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import base64
+import re
+import json
+import time
+import hashlib
+import httpx
 import requests
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from notion_client.errors import APIResponseError, HTTPResponseError, RequestTimeoutError
 
 from pdb import set_trace
 
+class MissingPropertyError(ValueError):
+    """
+    Raised when a row or filter names a property that is not in the (possibly stale) schema.
+    """
+    def __init__(self, property_name):
+        self.property_name = property_name
+        super().__init__(f"Property '{property_name}' does not exist in the database schema.")
+
+# Notion validation messages that name a property, e.g. "loss is expected to be number."
+_EXPECTED_TYPE_MESSAGE = re.compile(r"^(?P<name>.+?) is expected to be (?P<type>\w+)\.?")
+_UNKNOWN_PROPERTY_MESSAGE = re.compile(r"^(?P<name>.+?) is not a property that exists\.?")
+
+def is_schema_error(error, schema):
+    """
+    Check whether an error is caused by a stale schema: a property missing from it, or a Notion
+    validation error naming a property whose type (or existence) differs from the cached schema.
+    Bad values for an up-to-date property (a string sent to a number, ...) are not schema errors.
+    """
+    if isinstance(error, MissingPropertyError):
+        return True
+    if not (isinstance(error, APIResponseError) and error.code == "validation_error"):
+        return False
+    message = str(error)
+    match = _EXPECTED_TYPE_MESSAGE.match(message)
+    if match:
+        cached = schema.get(match.group('name'))
+        return cached is not None and cached['type'] != match.group('type')
+    match = _UNKNOWN_PROPERTY_MESSAGE.match(message)
+    return bool(match) and match.group('name') in schema
+
 def get_database_id(client, database_name):
     """
     Query the Notion API to find the database ID for the given database name.
@@ -21,6 +58,12 @@ def get_database_schema(client, database_id):
     Get information about each table within the database (their names, ids, field properties, etc.).
     """
     database_info = client.databases.retrieve(database_id=database_id)
+    return parse_database_schema(database_info)
+
+def parse_database_schema(database_info):
+    """
+    Build a schema dict from a database object (as returned by databases.retrieve or search).
+    """
     schema = {}
     for prop_name, prop_info in database_info["properties"].items():
         schema[prop_name] = {
@@ -30,11 +73,66 @@ def get_database_schema(client, database_id):
         }
     return schema
 
-def get_database_rows(client, database_id, filters=None, sorts=None, page_size=100):
+def infer_property_type(value):
+    """
+    Guess a Notion property type for a python value, for creating missing columns.
+    """
+    if isinstance(value, bool):
+        return 'checkbox'
+    if isinstance(value, (int, float)):
+        return 'number'
+    if isinstance(value, (list, tuple, set)):
+        return 'multi_select'
+    return 'rich_text'
+
+def create_properties(client, database_id, row_data, property_names):
+    """
+    Add property_names (typed from their values in row_data) to a database with a single databases.update.
+    Returns the updated schema.
+    """
+    properties = {name: {infer_property_type(row_data[name]): {}} for name in property_names}
+    database_info = client.databases.update(database_id=database_id, properties=properties)
+    return parse_database_schema(database_info)
+
+def get_database_title(database_info):
+    """
+    Get the plain text title of a database object.
+    """
+    return "".join(t.get("plain_text", "") for t in database_info.get("title", []))
+
+def list_databases(client, page_size=100):
+    """
+    List every database object accessible to the integration, following search pagination.
+    """
+    databases = []
+    payload = {
+        "filter": {"property": "object", "value": "database"},
+        "page_size": page_size
+    }
+    while True:
+        response = client.search(**payload)
+        databases.extend(response['results'])
+        if response.get('next_cursor'):
+            payload['start_cursor'] = response['next_cursor']
+        else:
+            break
+    return databases
+
+def get_database_rows(client, database_id, filters=None, sorts=None, page_size=100, filter_properties=None):
     """
     Retrieve all rows from a Notion database with optional filtering and sorting.
     """
     all_rows = []
+    for page in iter_database_pages(client, database_id, filters=filters, sorts=sorts, page_size=page_size,
+                                    filter_properties=filter_properties):
+        all_rows.extend(page)
+    return all_rows
+
+def iter_database_pages(client, database_id, filters=None, sorts=None, page_size=100, filter_properties=None):
+    """
+    Yield the rows of a Notion database one result page at a time.
+    filter_properties (a list of property ids) limits which properties each row carries.
+    """
     payload = {
         "database_id": database_id,
         "page_size": page_size
@@ -45,6 +143,9 @@ def get_database_rows(client, database_id, filters=None, sorts=None, page_size=1
     
     if sorts:
         payload['sorts'] = sorts
+
+    if filter_properties:
+        payload['filter_properties'] = filter_properties
     
     while True:
         try:
@@ -52,14 +153,43 @@ def get_database_rows(client, database_id, filters=None, sorts=None, page_size=1
         except Exception as e:
             raise RuntimeError(f"Failed to query database: {e}")
 
-        all_rows.extend(response['results'])
+        yield response['results']
 
         if response.get('next_cursor'):
             payload['start_cursor'] = response['next_cursor']
         else:
             break
 
-    return all_rows
+def list_row_ids(client, database_id, schema, page_size=100, filters=None):
+    """
+    List the ids of every live row (matching filters, if given), requesting only the title property
+    so each page stays small.
+    """
+    title_ids = [info['id'] for info in schema.values() if info['type'] == 'title']
+    row_ids = []
+    for page in iter_database_pages(client, database_id, filters=filters, page_size=page_size,
+                                    filter_properties=title_ids[:1]):
+        row_ids.extend(row['id'] for row in page)
+    return row_ids
+
+def _decode_text(value, prop_type):
+    return value[prop_type][0]['plain_text'] if value[prop_type] else ""
+
+# plain python value for each supported property type, shared by every row decoder
+PROPERTY_DECODERS = {
+    'title': lambda value: _decode_text(value, 'title'),
+    'rich_text': lambda value: _decode_text(value, 'rich_text'),
+    'number': lambda value: value['number'],
+    'select': lambda value: value['select']['name'] if value['select'] else None,
+    'multi_select': lambda value: [option['name'] for option in value['multi_select']],
+    'date': lambda value: value['date']['start'] if value['date'] else None,
+    'checkbox': lambda value: value['checkbox'],
+    'url': lambda value: value['url'],
+    'email': lambda value: value['email'],
+    'phone_number': lambda value: value['phone_number'],
+    'created_time': lambda value: value['created_time'],
+    'last_edited_time': lambda value: value['last_edited_time'],
+}
 
 def notion_rows_to_dataframe(rows):
     """
@@ -72,31 +202,10 @@ def notion_rows_to_dataframe(rows):
         properties = row['properties']
 
         for key, value in properties.items():
-            if value['type'] == 'title':
-                row_data[key] = value['title'][0]['text']['content'] if value['title'] else ""
-            elif value['type'] == 'rich_text':
-                row_data[key] = value['rich_text'][0]['text']['content'] if value['rich_text'] else ""
-            elif value['type'] == 'number':
-                row_data[key] = value['number']
-            elif value['type'] == 'select':
-                row_data[key] = value['select']['name'] if value['select'] else None
-            elif value['type'] == 'multi_select':
-                row_data[key] = [option['name'] for option in value['multi_select']]
-            elif value['type'] == 'date':
-                row_data[key] = value['date']['start'] if value['date'] else None
-            elif value['type'] == 'checkbox':
-                row_data[key] = value['checkbox']
-            elif value['type'] == 'url':
-                row_data[key] = value['url']
-            elif value['type'] == 'email':
-                row_data[key] = value['email']
-            elif value['type'] == 'phone_number':
-                row_data[key] = value['phone_number']
-            elif value['type'] == 'created_time':
-                row_data[key] = value['created_time']
-            elif value['type'] == 'last_edited_time':
-                row_data[key] = value['last_edited_time']
-            # Add more property types as needed
+            decode = PROPERTY_DECODERS.get(value['type'])
+            if decode is not None:
+                row_data[key] = decode(value)
+            # Add more property types to PROPERTY_DECODERS as needed
 
         data.append(row_data)
 
@@ -108,7 +217,7 @@ def format_properties(schema, row_data):
 
     for key, value in row_data.items():
         if key not in schema:
-            raise ValueError(f"Property '{key}' does not exist in the database schema.")
+            raise MissingPropertyError(key)
 
         prop_schema = schema[key]
         prop_type = prop_schema['type']
@@ -168,12 +277,68 @@ def insert_row(client, database_id, schema, row_data):
     )
     return response
 
+# conflict, rate limited, and transient server errors; the request may or may not have been applied
+RETRYABLE_STATUS_CODES = {409, 429, 500, 502, 503, 504}
+
+def is_retryable_error(error):
+    """
+    Check whether a failed request is worth retrying (timeouts, dropped connections, transient API errors).
+    """
+    if isinstance(error, (RequestTimeoutError, httpx.TransportError)):
+        return True
+    if isinstance(error, HTTPResponseError):
+        return error.status in RETRYABLE_STATUS_CODES
+    return False
+
+def retry_request(request, max_retries=5, retry_delay=1.0):
+    """
+    Call request() and retry it with exponential backoff while it fails with a retryable error.
+    Only use this for requests that are safe to repeat.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return request()
+        except Exception as e:
+            if not is_retryable_error(e) or attempt == max_retries:
+                raise
+            time.sleep(retry_delay * 2 ** attempt)
+
+def make_dedupe_key(row_data):
+    """
+    Deterministic idempotency key for a logical write, derived from its row data.
+    """
+    payload = json.dumps(row_data, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+def insert_row_idempotent(client, database_id, schema, row_data, key_property, max_retries=5, retry_delay=1.0):
+    """
+    Insert a row whose key_property holds an idempotency key, retrying transient failures.
+
+    A failed pages.create may still have written the row, so before each retry the key is looked
+    up with one filtered query and the existing row is returned instead of creating a duplicate.
+    """
+    if key_property not in row_data:
+        raise ValueError(f"A value for '{key_property}' must be provided to make the insert idempotent.")
+    key_filter = build_filter(schema, {key_property: row_data[key_property]})
+
+    attempts = 0
+    def request():
+        nonlocal attempts
+        attempts += 1
+        if attempts > 1:
+            response = client.databases.query(database_id=database_id, filter=key_filter, page_size=1)
+            if response['results']:
+                return response['results'][0]
+        return insert_row(client, database_id, schema, row_data)
+
+    return retry_request(request, max_retries=max_retries, retry_delay=retry_delay)
+
 def is_property_unique(client, database_id, schema, property_name, value):
     """
     Check if a given value for a property is unique in the database.
     """
     if property_name not in schema:
-        raise ValueError(f"Property '{property_name}' does not exist in the database schema.")
+        raise MissingPropertyError(property_name)
 
     prop_type = schema[property_name]['type']
     
@@ -212,7 +377,7 @@ def find_row_by_unique_property(client, database_id, schema, property_name, valu
     Find a row by a unique property in the Notion database.
     """
     if property_name not in schema:
-        raise ValueError(f"Property '{property_name}' does not exist in the database schema.")
+        raise MissingPropertyError(property_name)
 
     prop_type = schema[property_name]['type']
     
@@ -262,6 +427,36 @@ def update_row(client, row_id, schema, row_data):
     )
     return response
 
+def archive_row(client, row_id, max_retries=5, retry_delay=1.0):
+    """
+    Archive (delete) a single row, retrying transient failures. Archiving is idempotent, so retries are safe.
+    """
+    return retry_request(lambda: client.pages.update(page_id=row_id, archived=True),
+                         max_retries=max_retries, retry_delay=retry_delay)
+
+def archive_rows(client, row_ids, max_workers=8, dry_run=False, max_retries=5):
+    """
+    Archive many rows concurrently and return a {row_id: result} dict.
+
+    Each result is {"archived": True}, {"archived": False, "error": message}, or {"archived": False,
+    "dry_run": True}. Pair with a rate limited client (see NotionWorkspace) so the workers share one budget.
+    """
+    row_ids = list(dict.fromkeys(row_ids))
+    if dry_run:
+        return {row_id: {"archived": False, "dry_run": True} for row_id in row_ids}
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(archive_row, client, row_id, max_retries): row_id for row_id in row_ids}
+        for future in as_completed(futures):
+            row_id = futures[future]
+            try:
+                future.result()
+                results[row_id] = {"archived": True}
+            except Exception as e:
+                results[row_id] = {"archived": False, "error": str(e)}
+    return {row_id: results[row_id] for row_id in row_ids}
+
 def build_filter(schema, filter_dict):
     """
     Build a Notion filter from a dictionary of property names and values.
@@ -270,7 +465,7 @@ def build_filter(schema, filter_dict):
     
     for key, value in filter_dict.items():
         if key not in schema:
-            raise ValueError(f"Property '{key}' does not exist in the database schema.")
+            raise MissingPropertyError(key)
 
         prop_type = schema[key]['type']
         filter_condition = {"property": key}
@@ -304,11 +499,10 @@ def build_filter(schema, filter_dict):
 
 def get_filtered_rows(client, database_id, schema, filter_dict):
     """
-    Get rows from the Notion database based on a filter dictionary.
+    Get all rows from the Notion database matching a filter dictionary, following pagination.
     """
     notion_filter = build_filter(schema, filter_dict)
-    response = client.databases.query(database_id=database_id, filter=notion_filter)
-    return response['results']
+    return get_database_rows(client, database_id, filters=notion_filter)
 
 def row_to_plain_text(row, schema):
     """
@@ -549,6 +743,63 @@ def append_nested_blocks(client, page_id, toggle_block_content, toggle_block_typ
 
     return {"toggle_block": toggle_response, "nested_blocks": nested_responses}
 
+# Notion limits: characters per rich_text segment, segments per block, children per append request
+MAX_RICH_TEXT_LENGTH = 2000
+MAX_RICH_TEXT_SEGMENTS = 100
+MAX_BLOCKS_PER_APPEND = 100
+
+def chunk_text(text, max_length=MAX_RICH_TEXT_LENGTH):
+    """
+    Split text into chunks of at most max_length characters, breaking on newlines where possible.
+    """
+    chunks = []
+    current = ""
+    for line in text.splitlines(keepends=True):
+        while len(line) > max_length:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:max_length])
+            line = line[max_length:]
+        if len(current) + len(line) > max_length:
+            chunks.append(current)
+            current = ""
+        current += line
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _format_text_block(text, block_type='code', language='plain text', color='default'):
+    rich_text = [{"type": "text", "text": {"content": chunk}} for chunk in chunk_text(text)]
+    assert len(rich_text) <= MAX_RICH_TEXT_SEGMENTS, f"Block text exceeds {MAX_RICH_TEXT_SEGMENTS} rich_text segments"
+    block_content = {"rich_text": rich_text, "color": color}
+    if block_type == 'code':
+        block_content['language'] = language
+    return {"object": "block", "type": block_type, block_type: block_content}
+
+def pack_text_blocks(text, block_type='code', language='plain text', color='default', segments_per_block=1):
+    """
+    Pack text into as few blocks as possible, each holding up to segments_per_block full rich_text segments.
+    """
+    assert 1 <= segments_per_block <= MAX_RICH_TEXT_SEGMENTS, f"segments_per_block must be between 1 and {MAX_RICH_TEXT_SEGMENTS}"
+    # group line-aligned segments so no block needs more than segments_per_block rich_text items
+    segments = chunk_text(text)
+    chunks = ["".join(segments[i:i + segments_per_block]) for i in range(0, len(segments), segments_per_block)]
+    return [_format_text_block(chunk, block_type, language, color) for chunk in chunks]
+
+def append_blocks(client, page_id, formatted_blocks):
+    """
+    Append already formatted blocks to a page, batching up to MAX_BLOCKS_PER_APPEND children per request.
+    """
+    responses = []
+    for i in range(0, len(formatted_blocks), MAX_BLOCKS_PER_APPEND):
+        response = client.blocks.children.append(
+            block_id=page_id,
+            children=formatted_blocks[i:i + MAX_BLOCKS_PER_APPEND]
+        )
+        responses.append(response)
+    return responses
+
 def append_image_block(client, page_id, image_base64, caption=""):
     
     response = client.blocks.children.append(
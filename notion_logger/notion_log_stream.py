@@ -0,0 +1,189 @@
+import io
+import sys
+import logging
+import threading
+
+from . import notion_functional as F
+
+__all__ = ['NotionLogStream']
+
+FAILED_FLUSH_RETRY_INTERVAL = 5.0
+
+class NotionLogStream(io.TextIOBase):
+    """
+    File-like stream that buffers text and appends it to a Notion page in packed blocks.
+
+    A background thread sends the text every `flush_interval` seconds, or as soon as `flush_size`
+    characters are buffered, so a chatty training loop costs a handful of `blocks.children.append`
+    requests rather than one per line. Writers never wait on Notion. While Notion is unreachable,
+    at most `max_buffer_chars` are kept; older text is dropped and replaced by a marker line.
+    """
+    def __init__(self, client, page_id, block_type='code', language='plain text', color='default',
+                 segments_per_block=1, flush_size=None, flush_interval=5.0, tee=None, max_retries=5,
+                 max_buffer_chars=None):
+        assert block_type in ['code', 'paragraph'], f"Unsupported log block type: {block_type}"
+        self.client = client
+        self.page_id = page_id
+        self.block_type = block_type
+        self.language = language
+        self.color = color
+        self.segments_per_block = segments_per_block
+        if flush_size is None:
+            flush_size = F.MAX_RICH_TEXT_LENGTH * segments_per_block * F.MAX_BLOCKS_PER_APPEND
+        self.flush_size = flush_size
+        if max_buffer_chars is None:
+            max_buffer_chars = 10 * flush_size
+        self.max_buffer_chars = max_buffer_chars
+        self.flush_interval = flush_interval
+        self.tee = tee
+        self.max_retries = max_retries
+        self.responses = []
+        self.last_error = None
+        self.dropped_chars = 0
+        self._drop_marker = None
+
+        self._buffer = []
+        self._buffered_chars = 0
+        # _lock guards the buffer; _send_lock keeps sends in order without blocking writers during retries
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._stop = threading.Event()
+        # set by writers when the buffer reaches flush_size, so the send happens on the background thread
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._flush_periodically, daemon=True)
+        self._thread.start()
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        if self.closed:
+            raise ValueError("I/O operation on closed NotionLogStream.")
+        if self.tee is not None:
+            self.tee.write(text)
+        with self._lock:
+            self._buffer.append(text)
+            self._buffered_chars += len(text)
+            self._trim_buffer()
+            full = self._buffered_chars >= self.flush_size
+        if full:
+            self._wake.set()
+        return len(text)
+
+    def flush(self):
+        # logging.StreamHandler flushes after every record, so only the tee is flushed here;
+        # Notion is written on size/time triggers, or explicitly via sync()
+        if self.tee is not None:
+            self.tee.flush()
+
+    def sync(self):
+        """
+        Send everything buffered so far to Notion, including any partial last line.
+        If the append fails, the unsent text stays buffered and the error is raised.
+        """
+        self._flush(complete_lines=False)
+
+    def close(self):
+        if self.closed:
+            return
+        if sys.stdout is self:
+            sys.stdout = self.tee
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self.sync()
+        super().close()
+
+    def handler(self, level=logging.NOTSET, fmt=None):
+        """
+        Return a logging.Handler that writes records to this stream.
+        """
+        handler = logging.StreamHandler(self)
+        handler.setLevel(level)
+        if fmt is not None:
+            handler.setFormatter(logging.Formatter(fmt))
+        return handler
+
+    def tee_stdout(self):
+        """
+        Mirror sys.stdout into this stream; the original stdout is restored on close.
+        """
+        self.tee = sys.stdout
+        sys.stdout = self
+        return self
+
+    def _flush(self, complete_lines):
+        with self._send_lock:
+            with self._lock:
+                text = "".join(self._buffer)
+                split = len(text)
+                if complete_lines:
+                    # keep a trailing partial line buffered so a line is never split across flushes needlessly
+                    split = text.rfind("\n") + 1 or len(text)
+                self._buffer = [text[split:]] if split < len(text) else []
+                self._buffered_chars = len(text) - split
+            self._send(text[:split])
+
+    def _send(self, text):
+        if not text:
+            return
+        blocks = F.pack_text_blocks(text, block_type=self.block_type, language=self.language,
+                                    color=self.color, segments_per_block=self.segments_per_block)
+        for i in range(0, len(blocks), F.MAX_BLOCKS_PER_APPEND):
+            batch = blocks[i:i + F.MAX_BLOCKS_PER_APPEND]
+            try:
+                responses = F.retry_request(lambda: F.append_blocks(self.client, self.page_id, batch),
+                                            max_retries=self.max_retries)
+            except Exception:
+                # put the text of this and later batches back at the front of the buffer
+                unsent = "".join(segment["text"]["content"] for block in blocks[i:]
+                                 for segment in block[block["type"]]["rich_text"])
+                with self._lock:
+                    self._buffer.insert(0, unsent)
+                    self._buffered_chars += len(unsent)
+                    self._trim_buffer()
+                raise
+            self.responses.extend(responses)
+
+    def _trim_buffer(self):
+        # called with _lock held: keep only the newest max_buffer_chars, starting at a line boundary,
+        # behind a single marker line that counts what has been dropped so far
+        if self._buffered_chars <= self.max_buffer_chars + len(self._drop_marker or ""):
+            return
+        text = "".join(self._buffer)
+        if self._drop_marker and text.startswith(self._drop_marker):
+            text = text[len(self._drop_marker):]
+        cut = max(len(text) - self.max_buffer_chars, 0)
+        newline = text.find("\n", cut)
+        if newline != -1:
+            cut = newline + 1
+        self.dropped_chars += cut
+        self._drop_marker = f"[NotionLogStream: {self.dropped_chars} characters dropped while Notion was unreachable]\n"
+        kept = self._drop_marker + text[cut:]
+        self._buffer = [kept]
+        self._buffered_chars = len(kept)
+
+    def _flush_and_report(self):
+        # failures on the background thread must not kill it; the text stays buffered for the next
+        # flush. Report to the real stderr so the message can't loop back into this stream.
+        try:
+            self._flush(complete_lines=True)
+        except Exception as e:
+            self.last_error = e
+            sys.__stderr__.write(f"NotionLogStream: failed to append to page {self.page_id}: {e}\n")
+            return False
+        return True
+
+    def _flush_periodically(self):
+        # flush_interval=None (or 0) disables the timer; the thread then wakes on flush_size, and
+        # every FAILED_FLUSH_RETRY_INTERVAL seconds while text from a failed flush is waiting
+        failed = False
+        while True:
+            timeout = self.flush_interval or (FAILED_FLUSH_RETRY_INTERVAL if failed else None)
+            self._wake.wait(timeout)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            failed = False
+            if self._buffered_chars:
+                failed = not self._flush_and_report()
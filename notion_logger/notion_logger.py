@@ -1,38 +1,168 @@
 import os
-from notion_client import Client
+import functools
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
 
 from . import notion_functional as F
+from .notion_log_stream import NotionLogStream
+from .notion_export import export_database
+from .notion_rate_limit import RateLimitedClient
+from .notion_rows import get_compact_rows
 
-__all__ = ['NotionLogger']
+__all__ = ['NotionLogger', 'SchemaCache']
+
+class SchemaCache(object):
+    """
+    Versioned schema for one database, shareable between loggers and threads.
+
+    A refresh swaps in a new (schema, version) pair in one assignment and never mutates a published
+    schema dict, so readers always see a complete schema.
+    """
+    def __init__(self, schema, version=0):
+        self._state = (schema, version)
+        # reentrant so a refresh holding the lock can publish through update()
+        self.lock = threading.RLock()
+
+    @property
+    def schema(self):
+        return self._state[0]
+
+    @property
+    def version(self):
+        return self._state[1]
+
+    def snapshot(self):
+        return self._state
+
+    def update(self, schema):
+        with self.lock:
+            self._state = (schema, self._state[1] + 1)
+
+def _refresh_schema_on_drift(create_missing=False):
+    """
+    Retry a method once after refreshing the schema if it failed on an unknown property or a
+    property whose type changed in Notion (see F.is_schema_error). With create_missing, columns
+    still absent from the refreshed schema are created from the row data (the method's first
+    argument) when auto_create_properties is set.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            # nested calls (e.g. insert_or_update -> update_row) leave the refresh to the outermost one
+            if getattr(self._drift_state, 'active', False):
+                return method(self, *args, **kwargs)
+            self._drift_state.active = True
+            try:
+                schema, version = self._schema_cache.snapshot()
+                try:
+                    return method(self, *args, **kwargs)
+                except Exception as e:
+                    if not F.is_schema_error(e, schema):
+                        raise
+                row_data = args[0] if create_missing and args else None
+                self.refresh_schema(row_data, seen_version=version)
+                return method(self, *args, **kwargs)
+            finally:
+                self._drift_state.active = False
+        return wrapper
+    return decorator
 
 class NotionLogger(object):
-    def __init__(self, database_name, auth_token=None, unique_property=None):
-        if auth_token is None: 
-            auth_token = os.environ.get("NOTION_TOKEN", None)
-        assert auth_token is not None, "You must set env variable 'NOTION_TOKEN' or pass auth_token"        
-        self.client = Client(auth=auth_token)
+    def __init__(self, database_name, auth_token=None, unique_property=None, client=None, database_id=None, schema=None,
+                 dedupe_property=None, max_retries=5, auto_create_properties=False, max_acknowledged_keys=100000):
+        if client is None:
+            if auth_token is None: 
+                auth_token = os.environ.get("NOTION_TOKEN", None)
+            assert auth_token is not None, "You must set env variable 'NOTION_TOKEN' or pass auth_token"        
+            client = RateLimitedClient(auth=auth_token)
+        self.client = client
         self.database_name = database_name
-        self.database_id = F.get_database_id(self.client, self.database_name)
-        self.schema = F.get_database_schema(self.client, self.database_id)
+        # database_id and schema can be supplied from a cache (e.g. NotionWorkspace) to skip the lookups
+        if database_id is None:
+            database_id = F.get_database_id(self.client, self.database_name)
+        self.database_id = database_id
+        if schema is None:
+            schema = F.get_database_schema(self.client, self.database_id)
+        # schema may be a SchemaCache shared with other loggers (e.g. from NotionWorkspace)
+        self._schema_cache = schema if isinstance(schema, SchemaCache) else SchemaCache(schema)
+        self.auto_create_properties = auto_create_properties
+        self._drift_state = threading.local()
         self.unique_property = unique_property
+        # property holding each write's idempotency key; may be the unique_property itself
+        self.dedupe_property = dedupe_property
+        self.max_retries = max_retries
+        # key -> page id of an acknowledged write, or a pending Future while the write is in flight.
+        # Only the newest max_acknowledged_keys ids are kept; an evicted key is no longer deduplicated
+        # locally, so a repeat insert with it is checked only by unique_property (if any)
+        self._acknowledged_keys = OrderedDict()
+        self._acknowledged_lock = threading.Lock()
+        self.max_acknowledged_keys = max_acknowledged_keys
     
+    @property
+    def schema(self):
+        return self._schema_cache.schema
+
+    @property
+    def schema_version(self):
+        return self._schema_cache.version
+
+    def refresh_schema(self, row_data=None, seen_version=None):
+        """
+        Re-read the schema from Notion and publish it to every logger sharing this schema cache.
+        When auto_create_properties is set, any keys of row_data still missing are added to the
+        database with one databases.update. If seen_version is given and another thread has refreshed
+        since then, that newer schema is reused instead of fetching again.
+        """
+        cache = self._schema_cache
+        with cache.lock:
+            schema, version = cache.snapshot()
+            if seen_version is None or version == seen_version:
+                schema = F.get_database_schema(self.client, self.database_id)
+            if row_data and self.auto_create_properties:
+                missing = [key for key in row_data if key not in schema]
+                if missing:
+                    schema = F.create_properties(self.client, self.database_id, row_data, missing)
+            if schema is not cache.schema:
+                cache.update(schema)
+        return schema
+
     def list_databases(self):
         """
         List all databases accessible with the provided API token.
         """
-        response = self.client.search(filter={"property": "object", "value": "database"})
-        databases = [dict(title=db['title'][0]['plain_text'], id=db['id']) for db in response['results']]
+        databases = [dict(title=F.get_database_title(db), id=db['id']) for db in F.list_databases(self.client)]
         return databases
 
-    def get_rows(self, filters=None, sorts=None, page_size=100, as_dataframe=True, order="ascending"):
+    def get_rows(self, filters=None, sorts=None, page_size=100, as_dataframe=True, order="ascending", compact=False, keep_raw=False):
+        """
+        Get all rows. With compact=True rows come back as CompactRows (tuple-backed, raw JSON dropped
+        unless keep_raw=True), which also keeps peak memory low when building the DataFrame.
+        """
         if sorts is None:
             sorts = [{ "timestamp": "created_time", "direction": order }]
+
+        if compact:
+            rows = get_compact_rows(self.client, self.database_id, self.schema, filters=filters, sorts=sorts,
+                                    page_size=page_size, keep_raw=keep_raw)
+            if as_dataframe:
+                return rows.to_dataframe()
+            return rows
         
         rows = F.get_database_rows(self.client, self.database_id, filters=filters, sorts=sorts, page_size=page_size)
         if as_dataframe:
             return F.notion_rows_to_dataframe(rows)
         return rows
     
+    def export(self, path, detect_deletes=True, page_size=100):
+        """
+        Export the database to partitioned Parquet under `path`, fetching only rows created or
+        edited since the previous export. Load it back with `notion_logger.read_export(path)`.
+        detect_deletes lists every row id (title property only) to record deleted rows; see export_database.
+        """
+        return export_database(self.client, self.database_id, path, detect_deletes=detect_deletes, page_size=page_size,
+                               schema=self.schema)
+
     def get_row_by_id(self, row_id):
         """
         Retrieve a specific row by its Notion ID.
@@ -40,6 +170,7 @@ class NotionLogger(object):
         response = self.client.pages.retrieve(page_id=row_id)
         return response
     
+    @_refresh_schema_on_drift(create_missing=False)
     def find_row(self, filter_dict, plain_text=False):
         rows = F.get_filtered_rows(self.client, self.database_id, self.schema, filter_dict)
         if len(rows) == 0:
@@ -52,7 +183,20 @@ class NotionLogger(object):
         
         return rows[0]
     
-    def find_rows(self, filter_dict, plain_text=False):
+    @_refresh_schema_on_drift(create_missing=False)
+    def find_rows(self, filter_dict, plain_text=False, compact=False):
+        """
+        Find all rows matching filter_dict, following pagination past the first 100 matches.
+        With compact=True the matches are decoded page by page into CompactRows, so raw JSON for
+        the full result is never held at once; otherwise the raw rows are returned.
+        """
+        if compact:
+            notion_filter = F.build_filter(self.schema, filter_dict)
+            compact_rows = get_compact_rows(self.client, self.database_id, self.schema, filters=notion_filter)
+            if len(compact_rows) == 0:
+                raise ValueError(f"No row found matching filter criteria: {filter_dict}")
+            return compact_rows
+
         rows = F.get_filtered_rows(self.client, self.database_id, self.schema, filter_dict)
         if len(rows) == 0:
             raise ValueError(f"No row found matching filter criteria: {filter_dict}")
@@ -62,21 +206,89 @@ class NotionLogger(object):
         
         return rows
 
-    def insert(self, row_data, unique_property=None):
+    @_refresh_schema_on_drift(create_missing=True)
+    def insert(self, row_data, unique_property=None, dedupe_key=None):
+        """
+        Insert a new row. With a dedupe_property configured, the write is keyed so retries, repeated
+        calls and concurrent calls with the same key create one page. Concurrent callers all get its
+        create response; a later repeat is answered locally with a minimal {"object": "page", "id": ...}.
+
+        The key is dedupe_key, else the row's dedupe_property value, else a hash of row_data. With the
+        hash, inserting identical row data twice is treated as one write: the second row is merged into
+        the first. Pass an explicit dedupe_key when identical rows must be kept apart.
+        """
         if unique_property is None:
             unique_property = self.unique_property
             
         if unique_property and unique_property not in row_data:
             raise ValueError(f"A value for '{unique_property}' must be provided to enforce the unique_property constraint.")
-            
-        if unique_property and unique_property in row_data:
-            is_unique = F.is_property_unique(self.client, self.database_id, self.schema, unique_property, row_data[unique_property])
-            if not is_unique:
-                raise ValueError(f"Value for '{unique_property}' must be unique. The provided value '{row_data[unique_property]}' already exists.")
+
+        key = None
+        if self.dedupe_property:
+            row_data, key = self._with_dedupe_key(row_data, dedupe_key)
+
+        def check_unique():
+            if unique_property and unique_property in row_data:
+                is_unique = F.is_property_unique(self.client, self.database_id, self.schema, unique_property, row_data[unique_property])
+                if not is_unique:
+                    raise ValueError(f"Value for '{unique_property}' must be unique. The provided value '{row_data[unique_property]}' already exists.")
         
-        response = F.insert_row(self.client, self.database_id, self.schema, row_data)
+        response = self._insert_row(row_data, key, before_insert=check_unique)
+        return response
+
+    def _with_dedupe_key(self, row_data, dedupe_key=None):
+        existing = row_data.get(self.dedupe_property)
+        if dedupe_key is not None and existing is not None and existing != dedupe_key:
+            # never silently rewrite a value the caller set (e.g. the unique_property itself)
+            raise ValueError(f"dedupe_key '{dedupe_key}' conflicts with the value '{existing}' already given for "
+                             f"'{self.dedupe_property}'.")
+        if dedupe_key is None:
+            dedupe_key = existing
+        if dedupe_key is None:
+            dedupe_key = F.make_dedupe_key(row_data)
+        row_data = dict(row_data)
+        row_data[self.dedupe_property] = dedupe_key
+        return row_data, dedupe_key
+
+    def _insert_row(self, row_data, key=None, before_insert=None):
+        if key is None:
+            if before_insert is not None:
+                before_insert()
+            return F.insert_row(self.client, self.database_id, self.schema, row_data)
+
+        # reserve the key before writing, so concurrent callers with the same key wait for this write
+        with self._acknowledged_lock:
+            entry = self._acknowledged_keys.get(key)
+            if entry is None:
+                pending = self._acknowledged_keys[key] = Future()
+            elif not isinstance(entry, Future):
+                self._acknowledged_keys.move_to_end(key)
+                return {"object": "page", "id": entry}
+        if entry is not None:
+            return entry.result()
+
+        try:
+            if before_insert is not None:
+                before_insert()
+            response = F.insert_row_idempotent(self.client, self.database_id, self.schema, row_data,
+                                               self.dedupe_property, max_retries=self.max_retries)
+        except BaseException as e:
+            # release the key so a later call can try again; callers already waiting see this error
+            with self._acknowledged_lock:
+                if self._acknowledged_keys.get(key) is pending:
+                    del self._acknowledged_keys[key]
+            pending.set_exception(e)
+            raise
+        with self._acknowledged_lock:
+            # keep only the page id once the write resolves, and bound the map (least recently used first)
+            self._acknowledged_keys[key] = response['id']
+            self._acknowledged_keys.move_to_end(key)
+            while len(self._acknowledged_keys) > self.max_acknowledged_keys:
+                self._acknowledged_keys.popitem(last=False)
+        pending.set_result(response)
         return response
     
+    @_refresh_schema_on_drift(create_missing=True)
     def insert_or_update(self, row_data, unique_property=None):
         if unique_property is None:
             unique_property = self.unique_property
@@ -84,18 +296,23 @@ class NotionLogger(object):
         if unique_property and unique_property not in row_data:
             raise ValueError(f"A value for '{unique_property}' must be provided to enforce the unique_property constraint.")
         
+        key = None
+        if self.dedupe_property:
+            row_data, key = self._with_dedupe_key(row_data)
+
         response = None
         if unique_property:
             is_unique = F.is_property_unique(self.client, self.database_id, self.schema, unique_property, row_data[unique_property])
             if is_unique:
-                response = F.insert_row(self.client, self.database_id, self.schema, row_data)                
+                response = self._insert_row(row_data, key)
             else:
                 response = self.update_row(row_data, unique_property=unique_property)
         else:
-            response = F.insert_row(self.client, self.database_id, self.schema, row_data)
+            response = self._insert_row(row_data, key)
         
         return response
         
+    @_refresh_schema_on_drift(create_missing=True)
     def update_row(self, row_data, unique_property=None):
         if unique_property is None:
             unique_property = self.unique_property
@@ -122,6 +339,26 @@ class NotionLogger(object):
         )
         return response
         
+    @_refresh_schema_on_drift(create_missing=False)
+    def delete_rows(self, rows, dry_run=False, max_workers=8, confirm_all=False):
+        """
+        Delete (archive) many rows concurrently, given either a filter_dict (as in find_rows), a row id,
+        or an iterable of row ids. Returns a {row_id: result} dict; dry_run only lists the matches.
+        An empty filter_dict matches every row, so it is refused unless confirm_all=True.
+        """
+        if isinstance(rows, dict):
+            if not rows and not confirm_all:
+                raise ValueError("An empty filter_dict would delete every row; pass confirm_all=True to confirm.")
+            notion_filter = F.build_filter(self.schema, rows) if rows else None
+            # collect every matching id before archiving so removals can't shift the query's pagination
+            row_ids = F.list_row_ids(self.client, self.database_id, self.schema, filters=notion_filter)
+        elif isinstance(rows, str):
+            row_ids = [rows]
+        else:
+            row_ids = list(rows)
+        return F.archive_rows(self.client, row_ids, max_workers=max_workers, dry_run=dry_run,
+                              max_retries=self.max_retries)
+
     def list_blocks(self, page_id):
         """
         List all blocks in a page.
@@ -179,4 +416,14 @@ class NotionLogger(object):
         """
         response = F.append_nested_blocks(self.client, page_id, toggle_block_content, toggle_block_type, *blocks)
         return response
+
+    def open_log_stream(self, page_id, block_type='code', language='plain text', segments_per_block=1,
+                        flush_size=None, flush_interval=5.0, tee=None, max_buffer_chars=None):
+        """
+        Open a buffered, file-like stream that appends text to a page in packed code or paragraph blocks.
+        Use `stream.handler()` to attach it to a logger, or `stream.tee_stdout()` to mirror stdout.
+        """
+        return NotionLogStream(self.client, page_id, block_type=block_type, language=language,
+                               segments_per_block=segments_per_block, flush_size=flush_size,
+                               flush_interval=flush_interval, tee=tee, max_buffer_chars=max_buffer_chars)
     
\ No newline at end of file
@@ -0,0 +1,41 @@
+import time
+import threading
+from notion_client import Client
+
+__all__ = ['RateLimiter', 'RateLimitedClient']
+
+class RateLimiter(object):
+    """
+    Thread-safe token bucket. Notion allows an average of three requests per second per integration.
+    """
+    def __init__(self, rate=3.0, burst=3):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+class RateLimitedClient(Client):
+    """
+    notion_client.Client whose requests all pass through a shared RateLimiter.
+    The underlying httpx.Client keeps a connection pool, so one instance can serve many loggers and threads.
+    """
+    def __init__(self, auth=None, rate_limiter=None, **kwargs):
+        super().__init__(auth=auth, **kwargs)
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+
+    def request(self, *args, **kwargs):
+        self.rate_limiter.acquire()
+        return super().request(*args, **kwargs)
@@ -0,0 +1,112 @@
+import sys
+
+import pandas as pd
+
+from . import notion_functional as F
+
+__all__ = ['CompactRow', 'CompactRows', 'get_compact_rows']
+
+class CompactRow(object):
+    """
+    One database row: page id, timestamps and a tuple of decoded property values.
+    Column names live once on the parent CompactRows, not on every row.
+    """
+    __slots__ = ('id', 'created_time', 'last_edited_time', 'values', 'raw', '_rows')
+
+    def __init__(self, rows, id, created_time, last_edited_time, values, raw=None):
+        self._rows = rows
+        self.id = id
+        self.created_time = created_time
+        self.last_edited_time = last_edited_time
+        self.values = values
+        self.raw = raw
+
+    def __getitem__(self, column):
+        index = self._rows.column_index[column]
+        return self._rows._output(index, self.values[index])
+
+    def get(self, column, default=None):
+        index = self._rows.column_index.get(column)
+        return default if index is None else self._rows._output(index, self.values[index])
+
+    def keys(self):
+        return self._rows.columns
+
+    def to_dict(self):
+        row_dict = {"id": self.id}
+        for i, name in enumerate(self._rows.columns):
+            row_dict[name] = self._rows._output(i, self.values[i])
+        return row_dict
+
+    def __repr__(self):
+        return f"CompactRow({self.to_dict()!r})"
+
+class CompactRows(object):
+    """
+    Memory-light query result: rows are tuple-backed CompactRow objects sharing one interned column list
+    taken from the schema. Raw page JSON is decoded as each result page arrives and then dropped,
+    unless keep_raw is set.
+    """
+    def __init__(self, schema, keep_raw=False):
+        # only properties we know how to decode become columns, matching notion_rows_to_dataframe
+        self.columns = tuple(sys.intern(name) for name, info in schema.items() if info['type'] in F.PROPERTY_DECODERS)
+        self.column_index = {name: i for i, name in enumerate(self.columns)}
+        self._decoders = tuple(F.PROPERTY_DECODERS[schema[name]['type']] for name in self.columns)
+        self._intern = tuple(schema[name]['type'] in ('select', 'multi_select') for name in self.columns)
+        # multi_select values are held as tuples but handed out as lists, like notion_rows_to_dataframe
+        self._is_list = tuple(schema[name]['type'] == 'multi_select' for name in self.columns)
+        self.keep_raw = keep_raw
+        self.rows = []
+
+    def append(self, row):
+        properties = row['properties']
+        values = []
+        for name, decode, intern in zip(self.columns, self._decoders, self._intern):
+            value = properties.get(name)
+            value = decode(value) if value is not None else None
+            if intern and value is not None:
+                # select options repeat across rows; share one string object per option
+                value = tuple(sys.intern(v) for v in value) if isinstance(value, list) else sys.intern(value)
+            values.append(value)
+        self.rows.append(CompactRow(self, row['id'], row.get('created_time'), row.get('last_edited_time'),
+                                    tuple(values), row if self.keep_raw else None))
+
+    def _output(self, index, value):
+        if self._is_list[index] and value is not None:
+            return list(value)
+        return value
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __getitem__(self, index):
+        return self.rows[index]
+
+    def to_dicts(self):
+        return [row.to_dict() for row in self.rows]
+
+    def to_dataframe(self):
+        # same columns as notion_rows_to_dataframe (no page id), so compact and default get_rows() agree
+        data = {}
+        for i, name in enumerate(self.columns):
+            data[name] = [self._output(i, row.values[i]) for row in self.rows]
+        return pd.DataFrame(data, index=range(len(self.rows)))
+
+    def __repr__(self):
+        return f"CompactRows({len(self.rows)} rows, columns={list(self.columns)!r})"
+
+def get_compact_rows(client, database_id, schema, filters=None, sorts=None, page_size=100, keep_raw=False):
+    """
+    Retrieve all rows from a Notion database as CompactRows, decoding one result page at a time.
+    """
+    rows = CompactRows(schema, keep_raw=keep_raw)
+    for page in F.iter_database_pages(client, database_id, filters=filters, sorts=sorts, page_size=page_size):
+        rows.extend(page)
+    return rows
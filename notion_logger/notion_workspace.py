@@ -0,0 +1,84 @@
+import os
+import threading
+
+from . import notion_functional as F
+from .notion_logger import NotionLogger, SchemaCache
+from .notion_rate_limit import RateLimitedClient
+
+__all__ = ['NotionWorkspace']
+
+class NotionWorkspace(object):
+    """
+    Catalog of every database in a workspace, handing out NotionLoggers that share one client,
+    rate limiter and metadata cache.
+
+    The catalog (ids and schemas) is read once with a fully paginated search; loggers for
+    cataloged databases are then created without any further requests.
+    """
+    def __init__(self, auth_token=None, rate_limiter=None):
+        if auth_token is None:
+            auth_token = os.environ.get("NOTION_TOKEN", None)
+        assert auth_token is not None, "You must set env variable 'NOTION_TOKEN' or pass auth_token"
+        self.client = RateLimitedClient(auth=auth_token, rate_limiter=rate_limiter)
+        self.databases = None
+        self._loggers = {}
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """
+        Re-read every database's id and schema from Notion. Schemas are published through each
+        database's existing SchemaCache, so loggers already handed out see them too.
+        """
+        previous = self.databases or {}
+        databases = {}
+        for database_info in F.list_databases(self.client):
+            title = F.get_database_title(database_info)
+            # keep the first match, like F.get_database_id
+            if title in databases:
+                continue
+            schema = F.parse_database_schema(database_info)
+            cached = previous.get(title)
+            if cached is not None and cached['id'] == database_info['id']:
+                cached['schema'].update(schema)
+                databases[title] = cached
+            else:
+                databases[title] = dict(id=database_info['id'], schema=SchemaCache(schema))
+        with self._lock:
+            self.databases = databases
+        return databases
+
+    def list_databases(self):
+        if self.databases is None:
+            self.refresh()
+        return [dict(title=title, id=info['id']) for title, info in self.databases.items()]
+
+    def get_database(self, database_name):
+        if self.databases is None:
+            self.refresh()
+        if database_name not in self.databases:
+            # the database may have been created or shared after the catalog was read
+            self.refresh()
+        if database_name not in self.databases:
+            raise ValueError(f"Database with name '{database_name}' not found")
+        return self.databases[database_name]
+
+    def logger(self, database_name, unique_property=None, dedupe_property=None, auto_create_properties=False,
+               max_retries=5):
+        """
+        Get a NotionLogger for database_name that shares this workspace's client and SchemaCache.
+        Loggers are cached per combination of arguments.
+        """
+        key = (database_name, unique_property, dedupe_property, auto_create_properties, max_retries)
+        with self._lock:
+            if key in self._loggers:
+                return self._loggers[key]
+        database = self.get_database(database_name)
+        logger = NotionLogger(database_name, unique_property=unique_property, client=self.client,
+                              database_id=database['id'], schema=database['schema'],
+                              dedupe_property=dedupe_property, auto_create_properties=auto_create_properties,
+                              max_retries=max_retries)
+        with self._lock:
+            return self._loggers.setdefault(key, logger)
+
+    def close(self):
+        self.client.close()
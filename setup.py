@@ -14,9 +14,12 @@ setup(
     url="https://github.com/harvard-visionlab/notion-logger",
     packages=find_packages(),
     install_requires=[
-        "notion-client>=1.0.0",
+        "notion-client>=2.2.1,<3",
         "pandas",
     ],
+    extras_require={
+        "parquet": ["pyarrow>=14"],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
@@ -0,0 +1,170 @@
+import time
+import uuid
+import threading
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from notion_client.errors import APIResponseError
+
+from notion_logger import NotionLogger
+import notion_logger.notion_functional as F
+
+EMPTY_VALUES = {
+    'title': list,
+    'rich_text': list,
+    'number': lambda: None,
+    'select': lambda: None,
+    'multi_select': list,
+    'checkbox': lambda: False,
+}
+
+def validation_error(message):
+    return APIResponseError(httpx.Response(400), message, "validation_error")
+
+def _now():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+def _stored_value(prop_type, value):
+    if prop_type in ('title', 'rich_text'):
+        return [dict(segment, plain_text=segment['text']['content']) for segment in value]
+    return value
+
+def _plain_value(prop_value):
+    prop_type = prop_value['type']
+    if prop_type in ('title', 'rich_text'):
+        return "".join(segment['plain_text'] for segment in prop_value[prop_type])
+    if prop_type == 'select':
+        return prop_value['select']['name'] if prop_value['select'] else None
+    return prop_value[prop_type]
+
+class FakeNotion(object):
+    """
+    In-memory stand-in for notion_client.Client covering the endpoints notion_logger uses.
+
+    Pages are validated against `properties` ({name: type}) the way Notion does, and faults can be
+    queued per endpoint with fail(); a fault with applied=True raises after the request took effect,
+    like a timeout on a create that actually landed.
+    """
+    def __init__(self, properties, database_id="db"):
+        self.database_id = database_id
+        self.properties = {}
+        for name, prop_type in properties.items():
+            self.set_property(name, prop_type)
+        self.rows = {}
+        self.appended_blocks = []
+        self.calls = {}
+        self.create_delay = 0
+        self._faults = {}
+        self._lock = threading.Lock()
+        self.databases = SimpleNamespace(query=self._query, retrieve=self._retrieve, update=self._update)
+        self.pages = SimpleNamespace(create=self._create, update=self._update_page)
+        self.blocks = SimpleNamespace(children=SimpleNamespace(append=self._append))
+
+    def fail(self, endpoint, error, applied=False):
+        self._faults.setdefault(endpoint, []).append((error, applied))
+
+    def live_rows(self):
+        return [row for row in self.rows.values() if not row['archived']]
+
+    def set_property(self, name, prop_type):
+        prop_id = "title" if prop_type == 'title' else uuid.uuid4().hex[:4]
+        self.properties[name] = {"id": prop_id, "name": name, "type": prop_type, prop_type: {}}
+
+    def _call(self, endpoint, apply):
+        with self._lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+            faults = self._faults.get(endpoint)
+            error, applied = faults.pop(0) if faults else (None, False)
+        if error is not None and not applied:
+            raise error
+        result = apply()
+        if error is not None:
+            raise error
+        return result
+
+    def _retrieve(self, database_id):
+        return self._call('databases.retrieve', lambda: {"id": self.database_id, "properties": dict(self.properties)})
+
+    def _update(self, database_id, properties):
+        def apply():
+            for name, config in properties.items():
+                self.set_property(name, next(iter(config)))
+            return {"id": self.database_id, "properties": dict(self.properties)}
+        return self._call('databases.update', apply)
+
+    def _create(self, parent, properties):
+        def apply():
+            for name, value in properties.items():
+                if name not in self.properties:
+                    raise validation_error(f"{name} is not a property that exists.")
+                expected = self.properties[name]['type']
+                if next(iter(value)) != expected:
+                    raise validation_error(f"{name} is expected to be {expected}.")
+            if self.create_delay:
+                time.sleep(self.create_delay)
+            now = _now()
+            page = {"object": "page", "id": str(uuid.uuid4()), "created_time": now, "last_edited_time": now,
+                    "archived": False, "parent": parent, "properties": {}}
+            for name, info in self.properties.items():
+                prop_type = info['type']
+                value = properties[name][prop_type] if name in properties else EMPTY_VALUES[prop_type]()
+                page['properties'][name] = {"id": info['id'], "type": prop_type,
+                                            prop_type: _stored_value(prop_type, value)}
+            with self._lock:
+                self.rows[page['id']] = page
+            return page
+        return self._call('pages.create', apply)
+
+    def _update_page(self, page_id, archived=None, properties=None):
+        def apply():
+            page = self.rows[page_id]
+            if archived is not None:
+                page['archived'] = archived
+            page['last_edited_time'] = _now()
+            return page
+        return self._call('pages.update', apply)
+
+    def _query(self, database_id, filter=None, sorts=None, page_size=100, start_cursor=None, filter_properties=None):
+        def apply():
+            rows = [row for row in self.live_rows() if self._matches(row, filter)]
+            if sorts and sorts[0].get('timestamp') == 'last_edited_time':
+                rows.sort(key=lambda row: row['last_edited_time'])
+            start = int(start_cursor or 0)
+            results = rows[start:start + page_size]
+            if filter_properties:
+                results = [dict(row, properties={name: value for name, value in row['properties'].items()
+                                                 if value['id'] in filter_properties}) for row in results]
+            has_more = start + page_size < len(rows)
+            return {"object": "list", "results": results, "has_more": has_more,
+                    "next_cursor": str(start + page_size) if has_more else None}
+        return self._call('databases.query', apply)
+
+    def _matches(self, row, notion_filter):
+        if not notion_filter:
+            return True
+        if 'and' in notion_filter:
+            return all(self._matches(row, condition) for condition in notion_filter['and'])
+        if 'timestamp' in notion_filter:
+            timestamp = notion_filter['timestamp']
+            return row[timestamp] >= notion_filter[timestamp]['on_or_after']
+        prop_value = row['properties'][notion_filter['property']]
+        return _plain_value(prop_value) == notion_filter[prop_value['type']]['equals']
+
+    def _append(self, block_id, children):
+        def apply():
+            self.appended_blocks.extend(children)
+            return {"object": "list", "results": children}
+        return self._call('blocks.children.append', apply)
+
+@pytest.fixture
+def notion():
+    return FakeNotion({"Name": "title", "uuid": "rich_text", "loss": "number"})
+
+@pytest.fixture
+def make_logger(notion):
+    def make(**kwargs):
+        return NotionLogger("db", client=notion, database_id=notion.database_id,
+                            schema=F.get_database_schema(notion, notion.database_id), **kwargs)
+    return make
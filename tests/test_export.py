@@ -0,0 +1,45 @@
+import pytest
+
+from notion_logger import read_export
+
+pytest.importorskip("pyarrow")
+
+def test_reexport_writes_tombstones_for_archived_rows(notion, make_logger, tmp_path):
+    logger = make_logger()
+    rows = [logger.insert({"Name": f"run-{i}", "loss": float(i)}) for i in range(3)]
+    assert logger.export(tmp_path) == {"partition": "part-00000.parquet", "rows": 3, "archived": 0}
+
+    logger.delete_rows([rows[1]['id']])
+    result = logger.export(tmp_path)
+
+    assert result == {"partition": "part-00001.parquet", "rows": 2, "archived": 1}
+    df = read_export(tmp_path)
+    assert sorted(df['_id']) == sorted([rows[0]['id'], rows[2]['id']])
+    assert sorted(df['Name']) == ["run-0", "run-2"]
+
+    everything = read_export(tmp_path, include_archived=True)
+    assert len(everything) == 3
+    tombstone = everything[everything['_id'] == rows[1]['id']]
+    assert tombstone['_archived'].tolist() == [True]
+
+def test_reexport_lists_ids_with_title_property_only(notion, make_logger, tmp_path):
+    logger = make_logger()
+    logger.insert({"Name": "run"})
+    logger.export(tmp_path)
+    queries = []
+    query = notion.databases.query
+    notion.databases.query = lambda **kwargs: queries.append(kwargs.get('filter_properties')) or query(**kwargs)
+
+    logger.export(tmp_path)
+
+    assert [None, ["title"]] == queries
+
+def test_read_export_selects_columns(notion, make_logger, tmp_path):
+    logger = make_logger()
+    logger.insert({"Name": "run", "loss": 0.5})
+    logger.export(tmp_path)
+
+    table = read_export(tmp_path, columns=["loss"], as_table=True)
+
+    assert table.column_names == ["loss", "_id"]
+    assert table.column("loss").to_pylist() == [0.5]
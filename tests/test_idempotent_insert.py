@@ -0,0 +1,80 @@
+import threading
+
+import pytest
+from notion_client.errors import RequestTimeoutError
+
+import notion_logger.notion_functional as F
+
+def test_concurrent_inserts_with_same_key_create_one_page(notion, make_logger):
+    logger = make_logger(dedupe_property="uuid")
+    notion.create_delay = 0.05
+    responses = []
+
+    def insert():
+        responses.append(logger.insert({"Name": "run", "loss": 0.5}, dedupe_key="run-1"))
+
+    threads = [threading.Thread(target=insert) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert notion.calls['pages.create'] == 1
+    assert len(notion.live_rows()) == 1
+    assert {response['id'] for response in responses} == set(notion.rows)
+
+def test_repeat_insert_is_answered_locally(notion, make_logger):
+    logger = make_logger(dedupe_property="uuid")
+    first = logger.insert({"Name": "run", "loss": 0.5})
+    calls = dict(notion.calls)
+
+    repeat = logger.insert({"Name": "run", "loss": 0.5})
+
+    assert repeat == {"object": "page", "id": first['id']}
+    assert notion.calls == calls
+
+def test_acknowledged_keys_are_bounded(notion, make_logger):
+    logger = make_logger(dedupe_property="uuid", max_acknowledged_keys=2)
+    for i in range(5):
+        logger.insert({"Name": f"run-{i}"})
+
+    assert list(logger._acknowledged_keys.values()) == [row['id'] for row in notion.live_rows()[-2:]]
+
+def test_timeout_after_create_landed_returns_existing_row(notion):
+    schema = F.get_database_schema(notion, notion.database_id)
+    notion.fail('pages.create', RequestTimeoutError(), applied=True)
+
+    response = F.insert_row_idempotent(notion, notion.database_id, schema, {"Name": "run", "uuid": "k1"}, "uuid",
+                                       retry_delay=0)
+
+    assert notion.calls['pages.create'] == 1
+    assert notion.calls['databases.query'] == 1
+    assert len(notion.live_rows()) == 1
+    assert response['id'] == notion.live_rows()[0]['id']
+
+def test_timeout_before_create_landed_creates_row(notion):
+    schema = F.get_database_schema(notion, notion.database_id)
+    notion.fail('pages.create', RequestTimeoutError())
+
+    response = F.insert_row_idempotent(notion, notion.database_id, schema, {"Name": "run", "uuid": "k1"}, "uuid",
+                                       retry_delay=0)
+
+    assert notion.calls['pages.create'] == 2
+    assert [row['id'] for row in notion.live_rows()] == [response['id']]
+
+def test_failed_insert_releases_key(notion, make_logger):
+    logger = make_logger(dedupe_property="uuid", max_retries=0)
+    notion.fail('pages.create', RequestTimeoutError())
+
+    with pytest.raises(RequestTimeoutError):
+        logger.insert({"Name": "run"}, dedupe_key="k1")
+    response = logger.insert({"Name": "run"}, dedupe_key="k1")
+
+    assert [row['id'] for row in notion.live_rows()] == [response['id']]
+
+def test_conflicting_dedupe_key_is_rejected(notion, make_logger):
+    logger = make_logger(dedupe_property="uuid")
+
+    with pytest.raises(ValueError):
+        logger.insert({"Name": "run", "uuid": "a"}, dedupe_key="b")
+    assert not notion.rows
@@ -0,0 +1,53 @@
+import pytest
+from notion_client.errors import RequestTimeoutError
+
+from notion_logger import NotionLogStream
+
+def appended_text(notion):
+    return "".join(segment['text']['content'] for block in notion.appended_blocks
+                   for segment in block[block['type']]['rich_text'])
+
+def make_stream(notion, **kwargs):
+    return NotionLogStream(notion, "page", flush_interval=None, max_retries=0, **kwargs)
+
+def test_failed_append_rebuffers_text_in_order(notion):
+    stream = make_stream(notion)
+    stream.write("line 1\nline 2\n")
+    notion.fail('blocks.children.append', RequestTimeoutError())
+
+    with pytest.raises(RequestTimeoutError):
+        stream.sync()
+    stream.write("line 3\n")
+    stream.sync()
+    stream.close()
+
+    assert appended_text(notion) == "line 1\nline 2\nline 3\n"
+    assert notion.calls['blocks.children.append'] == 2
+
+def test_failed_batch_rebuffers_only_unsent_text(notion):
+    # 150 full blocks, sent as two requests of at most 100 blocks
+    lines = "".join(f"{i:04d}".ljust(1999, ".") + "\n" for i in range(150))
+    stream = make_stream(notion, flush_size=10 * len(lines))
+    stream.write(lines)
+    notion.fail('blocks.children.append', None)
+    notion.fail('blocks.children.append', RequestTimeoutError())
+
+    with pytest.raises(RequestTimeoutError):
+        stream.sync()
+    stream.sync()
+    stream.close()
+
+    assert appended_text(notion) == lines
+    assert notion.calls['blocks.children.append'] == 3
+
+def test_buffer_is_capped_while_notion_is_unreachable(notion):
+    stream = make_stream(notion, flush_size=1000, max_buffer_chars=20)
+    for i in range(10):
+        stream.write(f"line {i}\n")
+
+    stream.close()
+
+    text = appended_text(notion)
+    assert text.startswith("[NotionLogStream: ")
+    assert text.endswith("unreachable]\nline 8\nline 9\n")
+    assert stream.dropped_chars == len("".join(f"line {i}\n" for i in range(8)))
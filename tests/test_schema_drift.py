@@ -0,0 +1,53 @@
+import pytest
+
+from conftest import validation_error
+
+def test_changed_property_type_refreshes_and_retries(notion, make_logger):
+    notion.set_property("loss", "rich_text")
+    logger = make_logger(dedupe_property="uuid")
+    notion.set_property("loss", "number")
+
+    response = logger.insert({"Name": "run", "loss": 0.5}, dedupe_key="k1")
+
+    assert logger.schema['loss']['type'] == "number"
+    assert logger.schema_version == 1
+    assert notion.calls['pages.create'] == 2
+    assert [row['id'] for row in notion.live_rows()] == [response['id']]
+    assert response['properties']['loss']['number'] == 0.5
+    assert logger._acknowledged_keys == {"k1": response['id']}
+
+def test_property_added_in_notion_refreshes_and_retries(notion, make_logger):
+    logger = make_logger()
+    notion.set_property("epoch", "number")
+
+    response = logger.insert({"Name": "run", "epoch": 3})
+
+    assert notion.calls['pages.create'] == 1
+    assert response['properties']['epoch']['number'] == 3
+
+def test_missing_property_is_created_when_enabled(notion, make_logger):
+    logger = make_logger(auto_create_properties=True)
+
+    response = logger.insert({"Name": "run", "arch": "resnet18"})
+
+    assert notion.calls['databases.update'] == 1
+    assert logger.schema['arch']['type'] == "rich_text"
+    assert response['properties']['arch']['rich_text'][0]['plain_text'] == "resnet18"
+
+def test_missing_property_is_raised_when_not_enabled(notion, make_logger):
+    logger = make_logger()
+
+    with pytest.raises(ValueError):
+        logger.insert({"Name": "run", "arch": "resnet18"})
+    assert 'databases.update' not in notion.calls
+    assert not notion.rows
+
+def test_bad_value_for_current_property_is_not_retried(notion, make_logger):
+    logger = make_logger()
+    notion.fail('pages.create', validation_error("loss is expected to be number."))
+
+    with pytest.raises(Exception, match="expected to be number"):
+        logger.insert({"Name": "run", "loss": "high"})
+    assert notion.calls['pages.create'] == 1
+    assert notion.calls['databases.retrieve'] == 1
+    assert logger.schema_version == 0